@@ -1,71 +1,143 @@
-import sqlite3
+import re
+import time
 import random
-from myopenai import get_armenian_translation
+import asyncio
+import logging
+from db import create_connection, close_connection
+from myopenai import get_armenian_translation, openai_client
 
-async def transliterate_to_armenian(text):
-    # Подключение к базе данных SQLite
-    conn = sqlite3.connect('translations.db')
-    cursor = conn.cursor()
-    max_count = 10
-
-    # Словарь для транслитерации букв
-    transliteration_map = {
-        'А': ['Ա', 'Ը'], 'Б': ['Բ'], 'В': ['Վ'], 'Г': ['Գ'], 'Д': ['Դ'], 'Е': ['Ե', 'Է'], 'Ё': ['Յո'], 'Ж': ['Ժ'], 'З': ['Զ'],
-        'И': ['Ի'], 'Й': ['Յ'], 'К': ['Կ'], 'Л': ['Լ'], 'М': ['Մ'], 'Н': ['Ն'], 'О': ['Ո'], 'П': ['Պ'], 'Р': ['Ռ'],
-        'С': ['Ս'], 'Т': ['Տ'], 'У': ['Ու'], 'Ф': ['Ֆ'], 'Х': ['Խ', 'Հ'], 'Ц': ['Ց'], 'Ч': ['Չ'], 'Ш': ['Շ'], 'Щ': ['Շ'],
-        'Ъ': [''], 'Ы': ['Ը'], 'Ь': [''], 'Э': ['Է'], 'Ю': ['Յու'], 'Я': ['Յա'], 'а': ['ա', 'ը'], 'б': ['բ'], 'в': ['վ'],
-        'г': ['գ'], 'д': ['դ'], 'е': ['ե', 'է'], 'ё': ['յո'], 'ж': ['ժ'], 'з': ['զ'], 'и': ['ի'], 'й': ['յ'], 'к': ['կ'],
-        'л': ['լ'], 'м': ['մ'], 'н': ['ն'], 'о': ['ո'], 'п': ['պ'], 'р': ['ռ'], 'с': ['ս'], 'т': ['տ'], 'у': ['ու'],
-        'ф': ['ֆ'], 'х': ['խ', 'հ'], 'ц': ['ց'], 'ч': ['չ'], 'ш': ['շ'], 'щ': ['շ'], 'ъ': [''], 'ы': ['ը'], 'ь': [''],
-        'э': ['է'], 'ю': ['յու'], 'я': ['յա']
-    }
-
-    async def transliterate_to_armenian(text):
-        transliterated_text = ''.join(random.choice(transliteration_map.get(char, [char])) for char in text)
-        return transliterated_text
-
-    # Функция для перевода и транслитерации текста
-    async def translate_and_transliterate(text):
-        words = text.split()
-        result = []
-        for word in words:
-            transliterated_word = await transliterate_to_armenian(word)
-            cursor.execute('SELECT translation FROM translation_dict WHERE word=?', (word.lower(),))
-            row = cursor.fetchone()
-            if row:
-                transliterated_word += f" ({row[0]})"
+logger = logging.getLogger(__name__)
+
+# Словарь для транслитерации букв
+TRANSLITERATION_MAP = {
+    'А': ('Ա', 'Ը'), 'Б': ('Բ',), 'В': ('Վ',), 'Г': ('Գ',), 'Д': ('Դ',), 'Е': ('Ե', 'Է'), 'Ё': ('Յո',), 'Ж': ('Ժ',), 'З': ('Զ',),
+    'И': ('Ի',), 'Й': ('Յ',), 'К': ('Կ',), 'Л': ('Լ',), 'М': ('Մ',), 'Н': ('Ն',), 'О': ('Ո',), 'П': ('Պ',), 'Р': ('Ռ',),
+    'С': ('Ս',), 'Т': ('Տ',), 'У': ('Ու',), 'Ф': ('Ֆ',), 'Х': ('Խ', 'Հ'), 'Ц': ('Ց',), 'Ч': ('Չ',), 'Ш': ('Շ',), 'Щ': ('Շ',),
+    'Ъ': ('',), 'Ы': ('Ը',), 'Ь': ('',), 'Э': ('Է',), 'Ю': ('Յու',), 'Я': ('Յա',), 'а': ('ա', 'ը'), 'б': ('բ',), 'в': ('վ',),
+    'г': ('գ',), 'д': ('դ',), 'е': ('ե', 'է'), 'ё': ('յո',), 'ж': ('ժ',), 'з': ('զ',), 'и': ('ի',), 'й': ('յ',), 'к': ('կ',),
+    'л': ('լ',), 'м': ('մ',), 'н': ('ն',), 'о': ('ո',), 'п': ('պ',), 'р': ('ռ',), 'с': ('ս',), 'т': ('տ',), 'у': ('ու',),
+    'ф': ('ֆ',), 'х': ('խ', 'հ'), 'ц': ('ց',), 'ч': ('չ',), 'ш': ('շ',), 'щ': ('շ',), 'ъ': ('',), 'ы': ('ը',), 'ь': ('',),
+    'э': ('է',), 'ю': ('յու',), 'я': ('յա',)
+}
+
+# Однозначные буквы заменяются одним вызовом str.translate,
+# для букв с несколькими вариантами вариант выбирается случайно
+TRANSLITERATION_TABLE = str.maketrans({char: options[0] for char, options in TRANSLITERATION_MAP.items() if len(options) == 1})
+AMBIGUOUS_LETTERS = re.compile('[' + ''.join(char for char, options in TRANSLITERATION_MAP.items() if len(options) > 1) + ']')
+
+# Сколько раз должно встретиться неизвестное слово, прежде чем запросить его перевод
+MAX_COUNT = 10
+
+# Сколько слов запрашивается из translation_dict за один запрос: SQLite до 3.32
+# допускает не больше 999 параметров в одном запросе
+PREFETCH_BATCH_SIZE = 900
+
+# Запросы перевода, которые еще выполняются: ключ слова -> задача.
+# Сообщения с тем же словом ждут ту же задачу вместо повторного запроса к OpenAI
+_translation_tasks = {}
+
+# После неудачного запроса перевода слово не переводится повторно RETRY_DELAY секунд,
+# чтобы каждое сообщение с ним не ждало очередной ошибки OpenAI
+RETRY_DELAY = 600
+# Ключ слова -> время (time.monotonic), раньше которого перевод не запрашивается
+_retry_after = {}
+
+
+def transliterate_letters(text):
+    transliterated_text = text.translate(TRANSLITERATION_TABLE)
+    return AMBIGUOUS_LETTERS.sub(lambda match: random.choice(TRANSLITERATION_MAP[match.group()]), transliterated_text)
+
+
+# Перенос слова из unknown_words в translation_dict после получения перевода
+async def promote_word(key, word):
+    # Задачу ждут несколько сообщений, поэтому ошибка не пробрасывается, а только записывается в лог
+    try:
+        # Перевод запрашивается без открытой транзакции, чтобы ожидание OpenAI не блокировало базу
+        translation = await get_armenian_translation(word)
+        if translation is not None:
+            logger.info("Перевод слова '%s': %s", word, translation)
+            # OR IGNORE - на случай, если перевод уже был добавлен
+            with create_connection() as conn:
+                conn.execute('DELETE FROM unknown_words WHERE word = ?', (key,))
+                conn.execute('INSERT OR IGNORE INTO translation_dict (word, translation) VALUES (?, ?)', (key, translation))
+            _retry_after.pop(key, None)
+            return translation
+    except Exception:
+        logger.exception("Не удалось перенести слово '%s' в словарь", word)
+    # Счетчик остается, попытка повторится при упоминании слова после RETRY_DELAY
+    _retry_after[key] = time.monotonic() + RETRY_DELAY
+    return None
+
+
+# Функция для перевода и транслитерации текста
+async def translate_and_transliterate(text):
+    words = text.split()
+    if not words:
+        return ''
+    # Общее соединение с базой данных SQLite
+    conn = create_connection()
+    now = time.monotonic()
+    # Слова, набравшие MAX_COUNT упоминаний: ключ -> (слово, позиции в сообщении)
+    pending = {}
+    result = []
+    # with conn фиксирует изменения при успехе и откатывает их при ошибке
+    with conn:
+        cursor = conn.cursor()
+        # Получение переводов всех слов сообщения запросами по PREFETCH_BATCH_SIZE слов
+        keys = list(dict.fromkeys(word.lower() for word in words))
+        translations = {}
+        for start in range(0, len(keys), PREFETCH_BATCH_SIZE):
+            batch = keys[start:start + PREFETCH_BATCH_SIZE]
+            cursor.execute(f'SELECT word, translation FROM translation_dict WHERE word IN ({",".join("?" * len(batch))})', batch)
+            translations.update(cursor.fetchall())
+        for index, word in enumerate(words):
+            transliterated_word = transliterate_letters(word)
+            key = word.lower()
+            if key in translations:
+                transliterated_word += f" ({translations[key]})"
+            elif key in pending:
+                pending[key][1].append(index)
             else:
-                cursor.execute('SELECT count FROM unknown_words WHERE word=?', (word.lower(),))
-                row = cursor.fetchone()
-                if row:
-                    cursor.execute('UPDATE unknown_words SET count = count + 1 WHERE word = ?', (word.lower(),))
-                    # Получение обновленного значения count
-                    cursor.execute('SELECT count FROM unknown_words WHERE word = ?', (word.lower(),))
-                    count = cursor.fetchone()[0]
-                    if count >= max_count and len(word) > 1:
-                        # Удаление слова из таблицы unknown_words
-                        cursor.execute('DELETE FROM unknown_words WHERE word = ?', (word.lower(),))
-                        # Добавление слова в таблицу translation_dict
-                        translation = await get_armenian_translation(word)
-                        print(f"Перевод слова '{word}': {translation}")
-                        cursor.execute('INSERT INTO translation_dict (word, translation) VALUES (?, ?)', (word.lower(), translation))
-                        transliterated_word += f" ({translation})"
-                else:
-                    cursor.execute('INSERT INTO unknown_words (word, count) VALUES (?, ?)', (word.lower(), 1))
+                # Учет неизвестного слова одним UPSERT и получение обновленного значения count
+                cursor.execute('INSERT INTO unknown_words (word, count) VALUES (?, 1) '
+                               'ON CONFLICT(word) DO UPDATE SET count = count + 1', (key,))
+                cursor.execute('SELECT count FROM unknown_words WHERE word = ?', (key,))
+                count = cursor.fetchone()[0]
+                # Слово, перевод которого недавно не удался, ждет окончания RETRY_DELAY
+                if count >= MAX_COUNT and len(word) > 1 and _retry_after.get(key, 0) <= now:
+                    pending[key] = (word, [index])
             result.append(transliterated_word)
-        conn.commit()
-        return ' '.join(result)
 
-    # Пример использования
-    russian_text = text
-    armenian_text = await translate_and_transliterate(russian_text)
-    print(russian_text)
-    print(armenian_text)
+    tasks = []
+    for key, (word, indices) in pending.items():
+        task = _translation_tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(promote_word(key, word))
+            _translation_tasks[key] = task
+            task.add_done_callback(lambda _task, key=key: _translation_tasks.pop(key, None))
+        # shield - отмена одного обработчика не должна отменять общий запрос
+        tasks.append(asyncio.shield(task))
+    # Переводы разных слов запрашиваются параллельно, ответ ждет только самый долгий из них
+    translated = await asyncio.gather(*tasks)
+    for (word, indices), translation in zip(pending.values(), translated):
+        if translation is None:
+            continue
+        for index in indices:
+            result[index] += f" ({translation})"
+    return ' '.join(result)
+
 
-    # Закрытие соединения с базой данных
-    conn.close()
+async def transliterate_to_armenian(text):
+    armenian_text = await translate_and_transliterate(text)
+    logger.debug("%s -> %s", text, armenian_text)
     return armenian_text
 
+async def main():
+    try:
+        print(await transliterate_to_armenian("Привет, мир!"))
+    finally:
+        await openai_client.close()
+        close_connection()
+
 if __name__ == '__main__':
-    text = "Привет, мир!"
-    transliterate_to_armenian(text)
\ No newline at end of file
+    asyncio.run(main())
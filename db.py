@@ -0,0 +1,24 @@
+import sqlite3
+
+DB_PATH = 'translations.db'
+
+_connection = None
+
+def create_connection():
+    """Возвращает общее для всего бота соединение с базой, открывая его при первом вызове."""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(DB_PATH)
+        with _connection:
+            #создание таблицы учета пользователй если не существует user_id  - аутоинкрементный идентификатор пользователя
+            _connection.execute('CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY, user_name TEXT, times INTEGER)')
+            #индекс по имени пользователя, чтобы поиск не сканировал всю таблицу
+            _connection.execute('CREATE INDEX IF NOT EXISTS idx_users_user_name ON users (user_name)')
+    return _connection
+
+def close_connection():
+    """Закрывает общее соединение, если оно было открыто."""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
@@ -10,8 +10,11 @@ else:
     src_path = dirname(abspath(__file__))
 sys.path.append(src_path)
 import asyncio
+import logging
 import nest_asyncio
 from handlers import text_handler
+from myopenai import openai_client
+from db import close_connection
 #from handlers_async_test import  gpt, gpt_chat,  handle_photos, voice_to_text,document_upload, voice_to_text_chat #, error_handler, bot_response_final, image_generator, rewrite,
 #from utils_async import read_strings_from_file
 
@@ -21,13 +24,6 @@ from aiogram.contrib.middlewares.logging import LoggingMiddleware
 #from aiogram.utils import executor
  
 #from update_messager_async import update_messager
-#from db import create_connection
-from aiogram.dispatcher.filters import Command
-from aiogram.dispatcher import FSMContext
-from aiogram.dispatcher.filters.state import State, StatesGroup
-from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
-from aiogram.dispatcher.filters import Text
-from aiogram.types import Message
 #from keyboard_handling import start_command_handler, handle_callback
 
 #from aiogram.types import ParseMode
@@ -60,7 +56,7 @@ async def my_telegram_bot(api="t_api") -> None:
 
     # Register your async handlers here, for example:
     #dp.register_message_handler(gpt_chat, content_types=['text'])
-    dp.register_message_handler(text_handler, lambda message: message.chat.type == 'private', content_types=['text'])
+    dp.register_message_handler(text_handler, chat_type=types.ChatType.PRIVATE, content_types=['text'])
     # dp.register_message_handler(gpt_chat, lambda message: message.chat.type in ['group', 'supergroup'] and f'@vladimirgptweb_bot' in message.text.lower(), content_types=['text'])
 
     #dp.register_message_handler(handle_photos, content_types=['photo'])
@@ -77,11 +73,22 @@ async def my_telegram_bot(api="t_api") -> None:
     try:
         await dp.start_polling()
     finally:
-        await bot.close()
+        # Каждый ресурс закрывается отдельно, чтобы ошибка при закрытии одного не оставила открытыми остальные
+        try:
+            await bot.close()
+        finally:
+            try:
+                await openai_client.close()
+            finally:
+                close_connection()
 
 
 async def main():
     await my_telegram_bot("t_api_test")
 
 if __name__ == "__main__":
+    # Общий уровень WARNING, чтобы aiogram и httpx не писали строки на каждое обновление;
+    # INFO включен только для armenian_dict, чтобы были видны новые переводы слов
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("armenian_dict").setLevel(logging.INFO)
     asyncio.run(main())
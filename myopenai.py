@@ -1,10 +1,11 @@
 from os import getenv
-import base64
-import requests
 from dotenv import load_dotenv
 import asyncio
+import logging
 import httpx
 
+logger = logging.getLogger(__name__)
+
 class OpenAI:
     def __init__(self):
         load_dotenv()
@@ -13,6 +14,8 @@ class OpenAI:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        # HTTP-клиент создается при первом запросе и переиспользуется, чтобы не открывать новое TLS-соединение каждый раз
+        self.client = None
 
     async def answer(self, question, temperature=0.9, model="gpt-4o"):
         if not question:
@@ -25,7 +28,7 @@ class OpenAI:
 
         if not any(message.get('type') == 'image_url' for message in messages[0]['content']):
             model = "gpt-4o"
-        print(f" myo {model}")
+        logger.debug("myo %s", model)
 
         payload = {
             "model": model,
@@ -34,15 +37,22 @@ class OpenAI:
             "temperature": temperature
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post("https://api.openai.com/v1/chat/completions", headers=self.headers, json=payload, timeout=240)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as http_err:
-                return {"error": {"message": f"HTTP ошибка: {http_err}", "type": "HTTPError"}}
-            except httpx.RequestError as req_err:
-                return {"error": {"message": f"Ошибка запроса: {req_err}", "type": "RequestError"}}
+        if self.client is None:
+            self.client = httpx.AsyncClient()
+        try:
+            response = await self.client.post("https://api.openai.com/v1/chat/completions", headers=self.headers, json=payload, timeout=240)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as http_err:
+            return {"error": {"message": f"HTTP ошибка: {http_err}", "type": "HTTPError"}}
+        except httpx.RequestError as req_err:
+            return {"error": {"message": f"Ошибка запроса: {req_err}", "type": "RequestError"}}
+
+    async def close(self):
+        """Закрывает HTTP-клиент, если он был создан."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
 
     async def handle_response(self, response):
         """Обрабатывает успешный ответ от API."""
@@ -62,18 +72,36 @@ class OpenAI:
         error_type = error_info.get('type', 'Неизвестный тип ошибки.')
         return f"Ошибка: {error_message} Тип ошибки: {error_type}"
 
+# Общий клиент для всего бота
+openai_client = OpenAI()
+
 async def get_armenian_translation(word):
-    analyzer = OpenAI()
     question = f"Переведи на армянский язык слово '{word}'. не пиши предисловие послесловие точек кавычек итд, только слово перевода"
 
-    response = await analyzer.answer(question, temperature=0.1, model="gpt-3.5-turbo-0125")
-    result = await analyzer.handle_response(response)  # handle_response не является асинхронной
+    response = await openai_client.answer(question, temperature=0.1, model="gpt-3.5-turbo-0125")
+    # Ответ разбирается здесь, а не в handle_response: тот превращает ошибки в текст для пользователя,
+    # а в словарь как перевод не должен попасть ни текст ошибки, ни пустая строка
+    if 'error' in response:
+        error = response['error']
+        logger.warning("Не удалось получить перевод слова '%s': %s (%s)", word, error.get('message'), error.get('type'))
+        return None
+    try:
+        result = response['choices'][0]['message']['content']
+    except (IndexError, KeyError, TypeError):
+        logger.warning("Неожиданная структура ответа API для слова '%s'", word)
+        return None
+    result = (result or '').strip()
+    if not result:
+        logger.warning("Пустой перевод слова '%s'", word)
+        return None
 
-    print(result)
     return result
 
 async def main():
-    await get_armenian_translation("дудушка")
+    try:
+        print(await get_armenian_translation("дудушка"))
+    finally:
+        await openai_client.close()
 
 # Запуск асинхронной функции main
 if __name__ == "__main__":